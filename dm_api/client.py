@@ -1,10 +1,12 @@
 """High-level Python client for DM API."""
 
 import ctypes
+import functools
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Union
 
 from .constants import (
     ACTIVATION_ERROR_NAMES,
@@ -14,12 +16,41 @@ from .constants import (
     ENV_DM_LAUNCHER_TOKEN,
     ENV_DM_PUBLIC_KEY,
 )
-from .ffi import DmApiFFI
+from .ffi import DmApiFFI, get_ffi
 
 JsonDict = Dict[str, Any]
 
+_EMPTY_OPTIONS_BYTES = b"{}"
+_ACTIVATION_ERROR_NAMES_TUPLE = tuple(
+    ACTIVATION_ERROR_NAMES.get(i, "") for i in range(max(ACTIVATION_ERROR_NAMES) + 1)
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_cached_dev_pubkey(pubkey_path: Path, mtime_ns: int) -> str:
+    return pubkey_path.read_text(encoding="utf-8").strip()
+
+
+def _read_dev_pubkey(app_id: str) -> str:
+    pubkey_path = Path.home() / ".distromate-cli" / "dev_licenses" / app_id / "pubkey"
+    return _read_cached_dev_pubkey(pubkey_path, pubkey_path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=32)
+def _unknown_error_name(code: int) -> str:
+    return f"UNKNOWN({code})"
+
 
 class DmApi:
+    __slots__ = (
+        "app_id",
+        "public_key",
+        "_ffi",
+        "_license_callback_ref",
+        "_tls",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         public_key: Optional[str] = None,
@@ -28,8 +59,9 @@ class DmApi:
     ) -> None:
         self.app_id = app_id or os.environ.get(ENV_DM_APP_ID)
         self.public_key = public_key or os.environ.get(ENV_DM_PUBLIC_KEY)
-        self._ffi = DmApiFFI(dll_path=dll_path)
+        self._ffi = get_ffi(dll_path)
         self._license_callback_ref: Optional[Any] = None
+        self._tls = threading.local()
 
     @staticmethod
     def should_skip_check(
@@ -47,15 +79,16 @@ class DmApi:
                 "Provide app_id/public_key or set DM_APP_ID and DM_PUBLIC_KEY."
             )
 
-        pubkey_path = (
-            Path.home() / ".distromate-cli" / "dev_licenses" / str(resolved_app_id) / "pubkey"
-        )
+        expected_public_key = str(resolved_public_key).strip()
         try:
-            dev_pub_key = pubkey_path.read_text(encoding="utf-8").strip()
+            dev_pub_key = _read_dev_pubkey(str(resolved_app_id))
+            if dev_pub_key != expected_public_key:
+                _read_cached_dev_pubkey.cache_clear()
+                dev_pub_key = _read_dev_pubkey(str(resolved_app_id))
         except Exception as exc:
             raise RuntimeError(DEV_LICENSE_ERROR) from exc
 
-        if not dev_pub_key or dev_pub_key != str(resolved_public_key).strip():
+        if not dev_pub_key or dev_pub_key != expected_public_key:
             raise RuntimeError(DEV_LICENSE_ERROR)
 
         return True
@@ -66,19 +99,33 @@ class DmApi:
     def get_activation_error_name(self, code: Optional[int]) -> Optional[str]:
         if code is None:
             return None
-        return ACTIVATION_ERROR_NAMES.get(code, f"UNKNOWN({code})")
+        if 0 <= code < len(_ACTIVATION_ERROR_NAMES_TUPLE):
+            name = _ACTIVATION_ERROR_NAMES_TUPLE[code]
+            if name:
+                return name
+        return _unknown_error_name(code)
+
+    def _call_bool(self, func: Any) -> bool:
+        status: int = func()
+        return status == 0
 
-    def _call_bool(self, func: Any, *args: Any) -> bool:
-        return func(*args) == 0
+    def _call_bool1(self, func: Any, arg: Any) -> bool:
+        status: int = func(arg)
+        return status == 0
 
     def _call_u32(self, func: Any) -> Optional[int]:
-        value = ctypes.c_uint32(0)
-        if func(ctypes.byref(value)) != 0:
+        u32 = getattr(self._tls, "u32", None)
+        if u32 is None:
+            value = ctypes.c_uint32(0)
+            u32 = self._tls.u32 = (value, ctypes.byref(value))
+        out, ref = u32
+        out.value = 0
+        if func(ref) != 0:
             return None
-        return int(value.value)
+        return int(out.value)
 
     def _call_out_string(self, func: Any, size: int = 512) -> Optional[str]:
-        safe_size = max(8, int(size))
+        safe_size = size if size >= 8 else 8
         buf = ctypes.create_string_buffer(safe_size)
         if func(buf, safe_size) != 0:
             return None
@@ -91,28 +138,32 @@ class DmApi:
     def _encode_options(options: Optional[JsonDict]) -> Optional[bytes]:
         if options is None:
             return None
+        if not options:
+            return _EMPTY_OPTIONS_BYTES
         return json.dumps(options, separators=(",", ":")).encode("utf-8")
 
     def set_product_data(self, product_data: str) -> bool:
-        return self._call_bool(self._ffi.lib.SetProductData, product_data.encode("utf-8"))
+        status: int = self._ffi.lib.SetProductData(product_data.encode("utf-8"))
+        return status == 0
 
     def set_product_id(self, product_id: str) -> bool:
-        return self._call_bool(self._ffi.lib.SetProductId, product_id.encode("utf-8"))
+        return self._call_bool1(self._ffi.lib.SetProductId, product_id.encode("utf-8"))
 
     def set_data_directory(self, directory_path: str) -> bool:
-        return self._call_bool(self._ffi.lib.SetDataDirectory, directory_path.encode("utf-8"))
+        return self._call_bool1(self._ffi.lib.SetDataDirectory, directory_path.encode("utf-8"))
 
     def set_debug_mode(self, enable: bool) -> bool:
-        return self._call_bool(self._ffi.lib.SetDebugMode, 1 if enable else 0)
+        return self._call_bool1(self._ffi.lib.SetDebugMode, 1 if enable else 0)
 
     def set_custom_device_fingerprint(self, fingerprint: str) -> bool:
-        return self._call_bool(
+        return self._call_bool1(
             self._ffi.lib.SetCustomDeviceFingerprint,
             fingerprint.encode("utf-8"),
         )
 
     def set_license_key(self, license_key: str) -> bool:
-        return self._call_bool(self._ffi.lib.SetLicenseKey, license_key.encode("utf-8"))
+        status: int = self._ffi.lib.SetLicenseKey(license_key.encode("utf-8"))
+        return status == 0
 
     def set_license_callback(self, callback: Callable[[], None]) -> bool:
         if not callable(callback):
@@ -141,7 +192,7 @@ class DmApi:
         return self._call_u32(self._ffi.lib.GetServerSyncGracePeriodExpiryDate)
 
     def get_activation_mode(self, buffer_size: int = 64) -> Optional[Dict[str, str]]:
-        safe_size = max(8, int(buffer_size))
+        safe_size = buffer_size if buffer_size >= 8 else 8
         initial = ctypes.create_string_buffer(safe_size)
         current = ctypes.create_string_buffer(safe_size)
         code = self._ffi.lib.GetActivationMode(initial, safe_size, current, safe_size)
@@ -202,16 +253,18 @@ class DmApi:
         last_sequence: int,
         timeout_ms: int = 30000,
     ) -> Optional[JsonDict]:
-        sequence = max(0, int(last_sequence))
-        timeout = max(0, int(timeout_ms))
+        sequence = last_sequence if last_sequence >= 0 else 0
+        timeout = timeout_ms if timeout_ms >= 0 else 0
         return self._call_json(self._ffi.lib.DM_WaitForUpdateStateChange, sequence, timeout)
 
     def quit_and_install(self, options: Optional[JsonDict] = None) -> int:
         return int(self._ffi.lib.DM_QuitAndInstall(self._encode_options(options)))
 
     def get_library_version(self) -> str:
-        raw = self._ffi.lib.GetLibraryVersion()
-        return raw.decode("utf-8") if raw else ""
+        return self._ffi.get_library_version()
+
+    def json_to_canonical(self, json_data: Union[str, bytes]) -> Optional[str]:
+        return self._ffi.json_to_canonical(json_data)
 
-    def json_to_canonical(self, json_str: str) -> Optional[str]:
-        return self._ffi.json_to_canonical(json_str)
+    def json_to_canonical_bytes(self, json_bytes: bytes) -> Optional[bytes]:
+        return self._ffi.json_to_canonical_bytes(json_bytes)
@@ -1,138 +1,153 @@
 """Low-level ctypes wrapper around dm_api.dll."""
 
 import ctypes
+import functools
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from .constants import DEFAULT_DLL_NAME, ENV_DM_API_PATH
 
 
+LICENSE_CALLBACK_TYPE = ctypes.CFUNCTYPE(None)
+
+
+_SIGNATURES: Dict[str, Tuple[List[Any], Any]] = {
+    "DM_FreeString": ([ctypes.c_void_p], None),
+    "DM_GetLastError": ([], ctypes.c_void_p),
+    "DM_CheckForUpdates": ([ctypes.c_char_p], ctypes.c_void_p),
+    "DM_DownloadUpdate": ([ctypes.c_char_p], ctypes.c_void_p),
+    "DM_CancelUpdateDownload": ([ctypes.c_char_p], ctypes.c_void_p),
+    "DM_GetUpdateState": ([], ctypes.c_void_p),
+    "DM_GetPostUpdateInfo": ([], ctypes.c_void_p),
+    "DM_AckPostUpdateInfo": ([ctypes.c_char_p], ctypes.c_void_p),
+    "DM_WaitForUpdateStateChange": ([ctypes.c_uint64, ctypes.c_uint32], ctypes.c_void_p),
+    "DM_QuitAndInstall": ([ctypes.c_char_p], ctypes.c_int32),
+    "DM_JsonToCanonical": ([ctypes.c_char_p], ctypes.c_void_p),
+    "SetProductData": ([ctypes.c_char_p], ctypes.c_int32),
+    "SetProductId": ([ctypes.c_char_p], ctypes.c_int32),
+    "SetDataDirectory": ([ctypes.c_char_p], ctypes.c_int32),
+    "SetDebugMode": ([ctypes.c_uint32], ctypes.c_int32),
+    "SetCustomDeviceFingerprint": ([ctypes.c_char_p], ctypes.c_int32),
+    "SetLicenseKey": ([ctypes.c_char_p], ctypes.c_int32),
+    "SetLicenseCallback": ([LICENSE_CALLBACK_TYPE], ctypes.c_int32),
+    "ActivateLicense": ([], ctypes.c_int32),
+    "GetLastActivationError": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "IsLicenseGenuine": ([], ctypes.c_int32),
+    "IsLicenseValid": ([], ctypes.c_int32),
+    "GetServerSyncGracePeriodExpiryDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetActivationMode": (
+        [ctypes.c_char_p, ctypes.c_uint32, ctypes.c_char_p, ctypes.c_uint32],
+        ctypes.c_int32,
+    ),
+    "GetLicenseKey": ([ctypes.c_char_p, ctypes.c_uint32], ctypes.c_int32),
+    "GetLicenseExpiryDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetLicenseCreationDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetLicenseActivationDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetActivationCreationDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetActivationLastSyncedDate": ([ctypes.POINTER(ctypes.c_uint32)], ctypes.c_int32),
+    "GetActivationId": ([ctypes.c_char_p, ctypes.c_uint32], ctypes.c_int32),
+    "GetLibraryVersion": ([], ctypes.c_char_p),
+    "Reset": ([], ctypes.c_int32),
+}
+
+
+class _NativeLibrary(ctypes.CDLL):
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        func = self[name]
+        signature = _SIGNATURES.get(name)
+        if signature is not None:
+            func.argtypes, func.restype = signature
+        setattr(self, name, func)
+        return func
+
+
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def _resolve_dll(path: str) -> Path:
+    resolved = Path(path)
+    if resolved.is_absolute():
+        return resolved
+    candidates = [_PACKAGE_DIR / resolved, _PACKAGE_DIR.parent / resolved]
+    existing = next((candidate for candidate in candidates if candidate.exists()), None)
+    return existing or candidates[0]
+
+
+@functools.lru_cache(maxsize=4)
+def _load_lib(path: str) -> ctypes.CDLL:
+    return _NativeLibrary(path)
+
+
 class DmApiFFI:
-    LICENSE_CALLBACK_TYPE = ctypes.CFUNCTYPE(None)
+    LICENSE_CALLBACK_TYPE = LICENSE_CALLBACK_TYPE
+    __slots__ = (
+        "lib",
+        "_lib_version",
+        "_dm_free_string",
+        "_dm_json_to_canonical",
+        "__weakref__",
+    )
 
     def __init__(self, dll_path: Optional[str] = None) -> None:
         path = dll_path or os.environ.get(ENV_DM_API_PATH, DEFAULT_DLL_NAME)
-        resolved = Path(path)
-        if not resolved.is_absolute():
-            package_dir = Path(__file__).resolve().parent
-            candidates = [package_dir / resolved, package_dir.parent / resolved]
-            existing = next((candidate for candidate in candidates if candidate.exists()), None)
-            resolved = existing or candidates[0]
-
-        self.lib = ctypes.CDLL(str(resolved))
-        self._init_signatures()
-
-    def _init_signatures(self) -> None:
-        self.lib.DM_FreeString.argtypes = [ctypes.c_void_p]
-        self.lib.DM_FreeString.restype = None
-
-        self.lib.DM_GetLastError.argtypes = []
-        self.lib.DM_GetLastError.restype = ctypes.c_void_p
-
-        self.lib.DM_CheckForUpdates.argtypes = [ctypes.c_char_p]
-        self.lib.DM_CheckForUpdates.restype = ctypes.c_void_p
-        self.lib.DM_DownloadUpdate.argtypes = [ctypes.c_char_p]
-        self.lib.DM_DownloadUpdate.restype = ctypes.c_void_p
-        self.lib.DM_CancelUpdateDownload.argtypes = [ctypes.c_char_p]
-        self.lib.DM_CancelUpdateDownload.restype = ctypes.c_void_p
-        self.lib.DM_GetUpdateState.argtypes = []
-        self.lib.DM_GetUpdateState.restype = ctypes.c_void_p
-        self.lib.DM_GetPostUpdateInfo.argtypes = []
-        self.lib.DM_GetPostUpdateInfo.restype = ctypes.c_void_p
-        self.lib.DM_AckPostUpdateInfo.argtypes = [ctypes.c_char_p]
-        self.lib.DM_AckPostUpdateInfo.restype = ctypes.c_void_p
-        self.lib.DM_WaitForUpdateStateChange.argtypes = [ctypes.c_uint64, ctypes.c_uint32]
-        self.lib.DM_WaitForUpdateStateChange.restype = ctypes.c_void_p
-        self.lib.DM_QuitAndInstall.argtypes = [ctypes.c_char_p]
-        self.lib.DM_QuitAndInstall.restype = ctypes.c_int32
-
-        self.lib.DM_JsonToCanonical.argtypes = [ctypes.c_char_p]
-        self.lib.DM_JsonToCanonical.restype = ctypes.c_void_p
-
-        self.lib.SetProductData.argtypes = [ctypes.c_char_p]
-        self.lib.SetProductData.restype = ctypes.c_int32
-        self.lib.SetProductId.argtypes = [ctypes.c_char_p]
-        self.lib.SetProductId.restype = ctypes.c_int32
-        self.lib.SetDataDirectory.argtypes = [ctypes.c_char_p]
-        self.lib.SetDataDirectory.restype = ctypes.c_int32
-        self.lib.SetDebugMode.argtypes = [ctypes.c_uint32]
-        self.lib.SetDebugMode.restype = ctypes.c_int32
-        self.lib.SetCustomDeviceFingerprint.argtypes = [ctypes.c_char_p]
-        self.lib.SetCustomDeviceFingerprint.restype = ctypes.c_int32
-
-        self.lib.SetLicenseKey.argtypes = [ctypes.c_char_p]
-        self.lib.SetLicenseKey.restype = ctypes.c_int32
-        self.lib.SetLicenseCallback.argtypes = [self.LICENSE_CALLBACK_TYPE]
-        self.lib.SetLicenseCallback.restype = ctypes.c_int32
-        self.lib.ActivateLicense.argtypes = []
-        self.lib.ActivateLicense.restype = ctypes.c_int32
-        self.lib.GetLastActivationError.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetLastActivationError.restype = ctypes.c_int32
-
-        self.lib.IsLicenseGenuine.argtypes = []
-        self.lib.IsLicenseGenuine.restype = ctypes.c_int32
-        self.lib.IsLicenseValid.argtypes = []
-        self.lib.IsLicenseValid.restype = ctypes.c_int32
-        self.lib.GetServerSyncGracePeriodExpiryDate.argtypes = [
-            ctypes.POINTER(ctypes.c_uint32)
-        ]
-        self.lib.GetServerSyncGracePeriodExpiryDate.restype = ctypes.c_int32
-        self.lib.GetActivationMode.argtypes = [
-            ctypes.c_char_p,
-            ctypes.c_uint32,
-            ctypes.c_char_p,
-            ctypes.c_uint32,
-        ]
-        self.lib.GetActivationMode.restype = ctypes.c_int32
-
-        self.lib.GetLicenseKey.argtypes = [ctypes.c_char_p, ctypes.c_uint32]
-        self.lib.GetLicenseKey.restype = ctypes.c_int32
-        self.lib.GetLicenseExpiryDate.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetLicenseExpiryDate.restype = ctypes.c_int32
-        self.lib.GetLicenseCreationDate.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetLicenseCreationDate.restype = ctypes.c_int32
-        self.lib.GetLicenseActivationDate.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetLicenseActivationDate.restype = ctypes.c_int32
-        self.lib.GetActivationCreationDate.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetActivationCreationDate.restype = ctypes.c_int32
-        self.lib.GetActivationLastSyncedDate.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
-        self.lib.GetActivationLastSyncedDate.restype = ctypes.c_int32
-        self.lib.GetActivationId.argtypes = [ctypes.c_char_p, ctypes.c_uint32]
-        self.lib.GetActivationId.restype = ctypes.c_int32
-
-        self.lib.GetLibraryVersion.argtypes = []
-        self.lib.GetLibraryVersion.restype = ctypes.c_char_p
-        self.lib.Reset.argtypes = []
-        self.lib.Reset.restype = ctypes.c_int32
+        self.lib = _load_lib(str(_resolve_dll(path)))
+        self._lib_version: Optional[str] = None
+        self._dm_free_string = self.lib.DM_FreeString
+        self._dm_json_to_canonical = self.lib.DM_JsonToCanonical
+
+    def get_library_version(self) -> str:
+        version = self._lib_version
+        if version is None:
+            raw = self.lib.GetLibraryVersion()
+            version = self._lib_version = raw.decode("utf-8") if raw else ""
+        return version
 
     def ptr_to_json(self, ptr: int) -> Optional[Dict[str, Any]]:
         if not ptr:
             return None
         try:
-            raw = ctypes.cast(ptr, ctypes.c_char_p).value
+            raw = ctypes.string_at(ptr)
             if not raw:
                 return None
             return json.loads(raw)
         finally:
-            self.lib.DM_FreeString(ptr)
-
-    def json_to_canonical(self, json_str: str) -> Optional[str]:
-        ptr = self.lib.DM_JsonToCanonical(json_str.encode("utf-8"))
+            self._dm_free_string(ptr)
+
+    def json_to_canonical(self, json_data: Union[str, bytes]) -> Optional[str]:
+        if isinstance(json_data, str):
+            json_data = json_data.encode("utf-8")
+        raw = self.json_to_canonical_bytes(json_data)
+        return raw.decode("utf-8") if raw else None
+
+    def json_to_canonical_bytes(self, json_bytes: bytes) -> Optional[bytes]:
+        if not isinstance(json_bytes, bytes):
+            json_bytes = bytes(json_bytes)
+        ptr = self._dm_json_to_canonical(json_bytes)
         if not ptr:
             return None
         try:
-            raw = ctypes.cast(ptr, ctypes.c_char_p).value
-            return raw.decode("utf-8") if raw else None
+            return ctypes.string_at(ptr) or None
         finally:
-            self.lib.DM_FreeString(ptr)
+            self._dm_free_string(ptr)
 
     def ptr_to_string(self, ptr: int) -> Optional[str]:
         if not ptr:
             return None
         try:
-            raw = ctypes.cast(ptr, ctypes.c_char_p).value
+            raw = ctypes.string_at(ptr)
             return raw.decode("utf-8") if raw else None
         finally:
-            self.lib.DM_FreeString(ptr)
+            self._dm_free_string(ptr)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_ffi(path: str) -> DmApiFFI:
+    return DmApiFFI(path)
+
+
+def get_ffi(dll_path: Optional[str] = None) -> DmApiFFI:
+    return _shared_ffi(dll_path or os.environ.get(ENV_DM_API_PATH, DEFAULT_DLL_NAME))
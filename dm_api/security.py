@@ -1,43 +1,67 @@
 """Signature verification helpers."""
 
-import base64
+import hashlib
 import json
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import padding, rsa, utils
+
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode  # type: ignore[assignment]
+
+Canonicalizer = Callable[[str], Union[str, bytes, None]]
 
 
 class SignatureVerifier:
     def __init__(self, public_key_pem: str) -> None:
         self._public_key = serialization.load_pem_public_key(public_key_pem.encode("utf-8"))
+        self._padding = padding.PKCS1v15()
+        self._hash_alg = hashes.SHA256()
+        self._prehashed = utils.Prehashed(self._hash_alg)
+        self._sig_len: Optional[int] = None
+        if isinstance(self._public_key, rsa.RSAPublicKey):
+            self._sig_len = (self._public_key.key_size + 7) // 8
 
     def check_signature(
         self,
         data: Dict[str, Any],
-        nonce: str,
-        canonicalizer: Callable[[str], str],
+        nonce: Union[str, bytes],
+        canonicalizer: Canonicalizer,
     ) -> bool:
         signature = data.get("signature")
         if not signature:
             return False
 
         try:
-            sig = base64.b64decode(signature)
-            payload = {k: v for k, v in data.items() if k != "signature"}
-            payload["nonce_str"] = nonce
+            sig = b64decode(signature)
+            if self._sig_len is not None and len(sig) != self._sig_len:
+                return False
+            payload = dict(data)
+            del payload["signature"]
+            payload["nonce_str"] = nonce if isinstance(nonce, str) else nonce.decode("utf-8")
 
             json_str = json.dumps(payload, separators=(",", ":"))
             canonical = canonicalizer(json_str)
             if not canonical:
                 return False
-
-            self._public_key.verify(
-                sig,
-                canonical.encode("utf-8"),
-                padding.PKCS1v15(),
-                hashes.SHA256(),
+            canonical_bytes = (
+                canonical.encode("utf-8") if isinstance(canonical, str) else canonical
             )
+
+            digest = hashlib.sha256(canonical_bytes).digest()
+            self._public_key.verify(sig, digest, self._padding, self._prehashed)
             return True
         except Exception:
             return False
+
+    def check_signatures(
+        self,
+        items: Iterable[Tuple[Dict[str, Any], Union[str, bytes]]],
+        canonicalizer: Canonicalizer,
+    ) -> List[bool]:
+        check = self.check_signature
+        return [check(data, nonce, canonicalizer) for data, nonce in items]
+